@@ -33,7 +33,13 @@ document to a job.lilypond.LilyPondJob without implicitly creating a tab.
 """
 
 
+import codecs
+import errno
+import heapq
+import io
 import os
+import stat
+import tempfile
 
 from PyQt5.QtCore import QUrl
 from PyQt5.QtGui import QTextCursor, QTextDocument
@@ -45,6 +51,60 @@ import variables
 import signals
 
 
+class _Numbers:
+    """Hands out the lowest free positive number for nameless documents."""
+    def __init__(self):
+        self._free = [] # heap of released numbers below self._next
+        self._next = 1
+
+    def peek(self):
+        """Return the number take() would return, without taking it."""
+        return self._free[0] if self._free else self._next
+
+    def take(self):
+        """Take and return the lowest free number."""
+        if self._free:
+            return heapq.heappop(self._free)
+        self._next += 1
+        return self._next - 1
+
+    def release(self, num):
+        """Make a number taken earlier available again."""
+        heapq.heappush(self._free, num)
+
+
+_untitled = _Numbers()
+
+
+# the umask can only be read by setting it, so do that once, at import time
+_umask = os.umask(0o022)
+os.umask(_umask)
+
+
+def _replaceable(st):
+    """Return True if the file with os.stat() result st may be replaced.
+
+    A file is replaced by renaming a new file over it. That would break hard
+    links and change the owner of a file owned by another user, so such
+    files must be overwritten in place. st is None for a file that does not
+    exist yet.
+
+    """
+    if st is None:
+        return True
+    getuid = getattr(os, 'getuid', None)
+    return st.st_nlink == 1 and (getuid is None or st.st_uid == getuid())
+
+
+def _local_file(url):
+    """Return the local filename of the url, raise IOError if it is not local."""
+    filename = url.toLocalFile()
+    # currently, we do not support non-local files
+    if not filename:
+        raise IOError("not a local file")
+    return filename
+
+
 class AbstractDocument(QTextDocument):
     """Base class for a Frescobaldi document. Not intended to be instantiated.
 
@@ -66,12 +126,7 @@ class AbstractDocument(QTextDocument):
         The line separator is always '\\n'.
 
         """
-        filename = url.toLocalFile()
-
-        # currently, we do not support non-local files
-        if not filename:
-            raise IOError("not a local file")
-        with open(filename, 'rb') as f:
+        with open(_local_file(url), 'rb') as f:
             data = f.read()
         text = util.decode(data, encoding)
         return util.universal_newlines(text)
@@ -86,7 +141,7 @@ class AbstractDocument(QTextDocument):
         """
         d = cls(url, encoding)
         if not url.isEmpty():
-            d.setPlainText(cls.load_data(url, encoding))
+            d._load_stream(url, encoding)
             d.setModified(False)
         return d
 
@@ -103,6 +158,7 @@ class AbstractDocument(QTextDocument):
         super(AbstractDocument, self).__init__()
         self.setDocumentLayout(QPlainTextDocumentLayout(self))
         self._encoding = encoding
+        self._num = 0
         self._url = url # avoid urlChanged on init
         self.setUrl(url)
 
@@ -121,26 +177,149 @@ class AbstractDocument(QTextDocument):
         if url is None:
             url = QUrl()
         u = url if not url.isEmpty() else self.url()
-        text = self.load_data(u, encoding or self._encoding)
         if keepUndo:
+            text = self.load_data(u, encoding or self._encoding)
+            # insert in chunks, but as one undoable step
             c = QTextCursor(self)
+            c.beginEditBlock()
             c.select(QTextCursor.Document)
-            c.insertText(text)
+            c.removeSelectedText()
+            for i in range(0, len(text), 1 << 20):
+                c.insertText(text[i:i + (1 << 20)])
+            c.endEditBlock()
         else:
-            self.setPlainText(text)
+            self._load_stream(u, encoding or self._encoding)
         self.setModified(False)
         if not url.isEmpty():
             self.setUrl(url)
 
+    def _load_stream(self, url, encoding=None, chunksize=1 << 20):
+        """Replace the contents of the document with the contents of the url.
+
+        The file is read and decoded in chunks that are inserted directly,
+        so the full contents are never held in memory as bytes and as text
+        at the same time. The encoding is determined in the same way as
+        util.decode() does; the 'coding' variable is searched for in the
+        first and last 4096 bytes of the file.
+
+        """
+        with open(_local_file(url), 'rb') as f:
+            header = f.read(4096)
+            bom, data = util.get_bom(header)
+            start = len(header) - len(data)
+            def latin1():
+                # the top and the bottom of the file, where the variables are
+                text = data.decode('latin1')
+                size = os.fstat(f.fileno()).st_size
+                if size > len(header):
+                    pos = max(len(header), size - 4096)
+                    if pos > len(header):
+                        text += '\n'
+                    f.seek(pos)
+                    text += f.read().decode('latin1')
+                return text
+            undoRedoEnabled = self.isUndoRedoEnabled()
+            self.setUndoRedoEnabled(False)
+            # one edit block, so that listeners don't see the contents of a
+            # failed attempt
+            cursor = QTextCursor(self)
+            cursor.beginEditBlock()
+            try:
+                for enc in util.decode_encodings(bom, encoding, latin1):
+                    try:
+                        decoder = io.IncrementalNewlineDecoder(
+                            codecs.getincrementaldecoder(enc)(), True)
+                    except LookupError:
+                        continue
+                    cursor.select(QTextCursor.Document)
+                    cursor.removeSelectedText()
+                    f.seek(start)
+                    try:
+                        for chunk in iter(lambda: f.read(chunksize), b''):
+                            cursor.insertText(decoder.decode(chunk))
+                        cursor.insertText(decoder.decode(b'', True))
+                    except UnicodeError:
+                        continue
+                    break
+            finally:
+                cursor.endEditBlock()
+                self.setUndoRedoEnabled(undoRedoEnabled)
+
     def _save(self, url, filename):
-        with open(filename, "wb") as f:
-            f.write(self.encodedText())
-            f.flush()
-            os.fsync(f.fileno())
+        # Write to a temporary file in the same directory and then rename it
+        # over the original, so that a crash while saving never leaves a
+        # half-written file behind. Symlinks are followed, so the file they
+        # point to is replaced and not the link itself. If the file can't be
+        # replaced that way, it is overwritten in place.
+        path = os.path.realpath(filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        else:
+            # the rename only needs write access to the directory
+            if not os.access(path, os.W_OK):
+                raise PermissionError(
+                    errno.EACCES, os.strerror(errno.EACCES), filename)
+        if not (_replaceable(st) and self._replace_file(path, st)):
+            with open(path, "wb", buffering=0) as f:
+                self._write_file(f)
         self.setModified(False)
-        if not url.isEmpty():
+        # save() already set the url if we didn't have one
+        if not url.isEmpty() and url != self._url:
             self.setUrl(url)
 
+    def _replace_file(self, path, st):
+        """Write the document to a temporary file and rename it to path.
+
+        st is the os.stat() result of path, or None if it does not exist.
+        Returns False, without changing anything, if the temporary file can't
+        be created, given the group of the original or renamed.
+
+        """
+        try:
+            fd, temp = tempfile.mkstemp(
+                prefix='.' + os.path.basename(path) + '.',
+                dir=os.path.dirname(path))
+        except OSError:
+            return False
+        replaced = False
+        try:
+            with open(fd, "wb", buffering=0) as f:
+                if st is not None and os.fstat(fd).st_gid != st.st_gid:
+                    try:
+                        os.chown(temp, -1, st.st_gid)
+                    except OSError:
+                        return False
+                self._write_file(f)
+            os.chmod(temp, stat.S_IMODE(st.st_mode) if st else 0o666 & ~_umask)
+            try:
+                os.replace(temp, path)
+            except OSError:
+                # e.g. the file is opened by another process on Windows
+                return False
+            replaced = True
+        finally:
+            if not replaced:
+                try:
+                    os.remove(temp)
+                except OSError:
+                    pass
+        return True
+
+    def _write_file(self, f):
+        """Write the encoded text of the document to the unbuffered file f."""
+        fd = f.fileno()
+        try:
+            self._write_encoded(fd, self.encoding())
+        except (LookupError, UnicodeError):
+            # same fallback as util.encode()
+            f.seek(0)
+            f.truncate()
+            self._write_encoded(fd, 'utf-8')
+        # only the data needs to be on disk, not the inode metadata
+        getattr(os, 'fdatasync', os.fsync)(fd)
+
     def save(self, url=None, encoding=None):
         """Saves the document to the specified or current url.
 
@@ -176,14 +355,23 @@ class AbstractDocument(QTextDocument):
             url = QUrl()
         old, self._url = self._url, url
         # number for nameless documents
-        if self._url.isEmpty():
-            nums = [0]
-            nums.extend(doc._num for doc in app.documents if doc is not self)
-            self._num = max(nums) + 1
-        else:
-            self._num = 0
+        self._releaseNum()
+        self._num = self._takeNum() if self._url.isEmpty() else 0
         return old
 
+    def _takeNum(self):
+        """Return a number for a nameless document.
+
+        Only documents in the editor reserve their number, others just get
+        the number the next nameless editor document would get.
+
+        """
+        return _untitled.peek()
+
+    def _releaseNum(self):
+        """Called when the number of a nameless document is not used anymore."""
+        pass
+
     def encoding(self):
         return variables.get(self, "coding") or self._encoding
 
@@ -200,7 +388,33 @@ class AbstractDocument(QTextDocument):
 
         """
         text = util.platform_newlines(self.toPlainText())
-        return util.encode(text, self.encoding())
+        encoding = self.encoding()
+        if not encoding:
+            # encoding() already looked at the 'coding' variable, don't let
+            # util.encode() scan the text for it again
+            return text.encode('utf-8')
+        return util.encode(text, encoding)
+
+    def _encoded_chunks(self, encoding, chunksize=1 << 16):
+        """Yield the text of the document encoded in chunks of bytes.
+
+        The text is encoded chunksize characters at a time using an
+        incremental encoder, so no full encoded copy of the document is made.
+        Raises LookupError or UnicodeError if the encoding can't be used.
+
+        """
+        encoder = codecs.getincrementalencoder(encoding or 'utf-8')()
+        text = util.platform_newlines(self.toPlainText())
+        for i in range(0, len(text), chunksize):
+            yield encoder.encode(text[i:i+chunksize])
+        yield encoder.encode('', True)
+
+    def _write_encoded(self, fd, encoding):
+        """Write the encoded text of the document to file descriptor fd."""
+        for data in self._encoded_chunks(encoding):
+            data = memoryview(data)
+            while data:
+                data = data[os.write(fd, data):]
 
     def documentName(self):
         """Return a suitable name for this document.
@@ -258,6 +472,7 @@ class EditorDocument(AbstractDocument):
         self.closed()
         app.documentClosed(self)
         app.documents.remove(self)
+        self._releaseNum()
 
     def load(self, url=None, encoding=None, keepUndo=False):
         super(EditorDocument, self).load(url, encoding, keepUndo)
@@ -271,6 +486,14 @@ class EditorDocument(AbstractDocument):
         self.saved()
         app.documentSaved(self)
 
+    def _takeNum(self):
+        return _untitled.take()
+
+    def _releaseNum(self):
+        if self._num:
+            _untitled.release(self._num)
+            self._num = 0
+
     def setUrl(self, url):
         old = super(EditorDocument, self).setUrl(url)
         if url != old:
@@ -22,6 +22,7 @@ Export to non-lilypond file types.
 """
 
 
+import datetime
 import os
 
 from PyQt5.QtCore import Qt, QUrl, QSize
@@ -67,6 +68,10 @@ class FileExport(plugin.MainWindowPlugin):
         # put the Frescobaldi version in the xml file
         software = xml.root.find('.//encoding/software')
         software.text = "{0} {1}".format(appinfo.appname, appinfo.version)
+        # some python-ly versions leave the encoding date empty
+        date = xml.root.find('.//encoding/encoding-date')
+        if date is not None and not date.text:
+            date.text = datetime.date.today().isoformat()
         try:
             xml.write(filename)
         except (IOError, OSError) as err:
@@ -36,11 +36,12 @@ _cache = {}
 
 def get(name):
     """Returns an icon with the specified name."""
-    if QIcon.hasThemeIcon(name):
-        return QIcon.fromTheme(name)
     try:
         return _cache[name]
     except KeyError:
+        if QIcon.hasThemeIcon(name):
+            icon = _cache[name] = QIcon.fromTheme(name)
+            return icon
         icon = _cache[name] = QIcon()
         # first try SVG
         fname = 'icons:{0}.svg'.format(name)
@@ -86,6 +87,8 @@ def initialize():
 
 def update_theme():
     """Change the theme for icon lookup after change of style preference"""
+    # whether an icon comes from the theme may change
+    _cache.clear()
     s = QSettings()
     if s.value("system_icons", True, bool):
         QIcon.setThemeName(s.value("guistyle", "", str))
@@ -34,6 +34,7 @@ def display(item):
 def translate(item):
     """Calls an item (normally returning a translation of the item)."""
     return item()
+translate.cached = True
 
 def display_index(index):
     """Returns a function that displays the given index of an item."""
@@ -41,7 +42,9 @@ def display_index(index):
 
 def translate_index(index):
     """Returns a function that translates the given index of an item."""
-    return lambda item: item[index]()
+    f = lambda item: item[index]()
+    f.cached = True
+    return f
 
 
 class ListModel(QAbstractListModel):
@@ -55,10 +58,15 @@ class ListModel(QAbstractListModel):
 
         The original data can be found in the _data attribute.
 
+        The results of role functions that have a true "cached" attribute
+        (like translate and translate_index) are cached until update()
+        is called.
+
         """
         super(ListModel, self).__init__(parent)
         self._data = data
         self._roles = {}
+        self._cache = {}
         if edit is None:
             edit = display
         if display:
@@ -69,6 +77,8 @@ class ListModel(QAbstractListModel):
             self._roles[Qt.ToolTipRole] = tooltip
         if icon:
             self._roles[Qt.DecorationRole] = icon
+        self._cachedRoles = set(role for role, f in self._roles.items()
+                                if getattr(f, 'cached', False))
 
     def setRoleFunction(self, role, function):
         """Sets a function that returns a value for a Qt.ItemDataRole.
@@ -81,6 +91,11 @@ class ListModel(QAbstractListModel):
             self._roles[role] = function
         elif role in self._roles:
             del self._roles[role]
+        if getattr(function, 'cached', False):
+            self._cachedRoles.add(role)
+        else:
+            self._cachedRoles.discard(role)
+        self._cache.clear()
 
     def rowCount(self, parent):
         return 0 if parent.isValid() else len(self._data)
@@ -94,14 +109,23 @@ class ListModel(QAbstractListModel):
             f = self._roles[role]
         except KeyError:
             return
-        return f(data)
+        if role not in self._cachedRoles:
+            return f(data)
+        key = index.row(), role
+        try:
+            return self._cache[key]
+        except KeyError:
+            result = self._cache[key] = f(data)
+            return result
 
     def update(self):
         """Emits the dataChanged signal for all entries.
 
         This can e.g. be used to request that translated strings are redisplayed.
+        The cached results of translating role functions are discarded.
 
         """
+        self._cache.clear()
         self.dataChanged.emit(
             self.createIndex(0, 0),
             self.createIndex(len(self._data) - 1, 0))
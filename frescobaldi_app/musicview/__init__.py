@@ -41,13 +41,14 @@ import weakref
 from PyQt5.QtCore import QSettings, QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QColor, QKeySequence, QPalette
 from PyQt5.QtWidgets import (
-    QAction, QActionGroup, QApplication, QComboBox, QLabel, QSpinBox,
-    QWidgetAction)
+    QAction, QActionGroup, QApplication, QComboBox, QLabel, QMessageBox,
+    QSpinBox, QWidgetAction)
 
 import app
 import actioncollection
 import actioncollectionmanager
 import icons
+import engrave
 import job
 import pagedview
 import qpageview.document
@@ -63,6 +64,36 @@ from qpageview import FixedScale, FitWidth, FitHeight, FitBoth
 from qpageview import Horizontal, Vertical
 
 
+_darwin = sys.platform.startswith('darwin')
+
+_settings = None
+
+
+def settings():
+    """Return a QSettings object positioned in the "musicview" group.
+
+    The same object is returned every time, so the panel does not need to
+    construct and position a new QSettings for every read or write.
+
+    """
+    global _settings
+    if _settings is None:
+        _settings = QSettings()
+        _settings.beginGroup("musicview")
+    return _settings
+
+
+@functools.lru_cache(maxsize=32)
+def _extension_icon(extension):
+    """Return the icon for the file type with the extension (cached)."""
+    return icons.file_type(extension)
+
+
+def _file_icon(filename):
+    """Return the file type icon for the filename, looked up by extension."""
+    return _extension_icon(os.path.splitext(filename)[1][1:].lower())
+
+
 def activate(func):
     """Decorator for MusicViewPanel methods/slots.
 
@@ -103,9 +134,14 @@ class MusicViewPanel(panel.Panel):
         ac.music_reload.triggered.connect(self.reloadView)
         ac.music_clear.triggered.connect(self.clearView)
 
+        # write the sync cursor setting only some time after toggling
+        self._syncCursor = None # the pending state, if not yet written
+        self._syncCursorTimer = QTimer(self, singleShot=True,
+            timeout=self.writeSyncCursor)
+        mainwindow.aboutToClose.connect(self.flushSyncCursor)
+
         # load the state of the actions from the preferences
-        s = QSettings()
-        s.beginGroup("musicview")
+        s = settings()
         ac.music_sync_cursor.setChecked(s.value("sync_cursor", False, bool))
         props = pagedview.PagedView.properties().setdefaults().load(s)
         ac._viewActions.updateFromProperties(props)
@@ -118,12 +154,11 @@ class MusicViewPanel(panel.Panel):
     def createWidget(self):
         from . import widget
         w = widget.MusicView(self)
-        s = QSettings()
-        s.beginGroup("musicview")
-        w.view.readProperties(s)
+        w.view.readProperties(settings())
         w.view.rubberband().selectionChanged.connect(self.updateSelection)
-        self.actionCollection._viewActions.setView(w.view)
-        selector = self.actionCollection.music_document_select
+        ac = self.actionCollection
+        ac._viewActions.setView(w.view)
+        selector = ac.music_document_select
         selector.currentDocumentChanged.connect(w.openDocument)
         selector.documentClosed.connect(w.clear)
 
@@ -139,13 +174,13 @@ class MusicViewPanel(panel.Panel):
     def writeSettings(self):
         """Save the current view properties as default."""
         if self.instantiated():
-            s = QSettings()
-            s.beginGroup("musicview")
-            self.widget().view.writeProperties(s)
+            self.widget().view.writeProperties(settings())
 
     def updateSelection(self, rect):
-        self.actionCollection.music_copy_image.setEnabled(bool(rect))
-        self.actionCollection.music_copy_text.setEnabled(bool(rect))
+        ac = self.actionCollection
+        enabled = bool(rect)
+        ac.music_copy_image.setEnabled(enabled)
+        ac.music_copy_text.setEnabled(enabled)
 
     def updateActions(self):
         ac = self.actionCollection
@@ -153,14 +188,11 @@ class MusicViewPanel(panel.Panel):
 
     @activate
     def printMusic(self):
-        if self.widget().view.pageCount():
+        view = self.widget().view
+        if view.pageCount():
             # warn about printing directly with cups on Mac
-            s = QSettings()
-            if (s.value("printing/directcups",
-                       False if sys.platform.startswith('darwin') else True, bool)
-                and sys.platform.startswith('darwin')):
-                from PyQt5.QtCore import QUrl
-                from PyQt5.QtWidgets import QMessageBox
+            if (_darwin and
+                QSettings().value("printing/directcups", False, bool)):
                 result =  QMessageBox.warning(self.mainwindow(),
                     _("Print Music"), _(
                     "As per your settings, you are about to print the file "
@@ -173,7 +205,7 @@ class MusicViewPanel(panel.Panel):
                     QMessageBox.Yes | QMessageBox.No)
                 if result == QMessageBox.No:
                     return
-            self.widget().view.print()
+            view.print()
 
     @activate
     def jumpToCursor(self):
@@ -195,15 +227,31 @@ class MusicViewPanel(panel.Panel):
             self.actionCollection.music_document_select.setCurrentDocument(d)
             self.widget().clear()
 
-    def toggleSyncCursor(self):
-        QSettings().setValue("musicview/sync_cursor",
-            self.actionCollection.music_sync_cursor.isChecked())
+    def toggleSyncCursor(self, checked):
+        self._syncCursor = checked
+        self._syncCursorTimer.start(250)
+
+    def writeSyncCursor(self):
+        """Save the pending state of the sync cursor action in the settings."""
+        if self._syncCursor is not None:
+            s = settings()
+            s.setValue("sync_cursor", self._syncCursor)
+            # the shared QSettings is never destroyed, so it would not
+            # write the changes itself when the application quits
+            s.sync()
+            self._syncCursor = None
+
+    def flushSyncCursor(self):
+        """Save the sync cursor state now if it is still pending."""
+        self._syncCursorTimer.stop()
+        self.writeSyncCursor()
 
     def copyImage(self):
-        page, rect = self.widget().view.rubberband().selectedPage()
+        view = self.widget().view
+        page, rect = view.rubberband().selectedPage()
         if not page:
             return
-        filename = self.widget().view.document().filename()
+        filename = view.document().filename()
         import copy2image
         copy2image.copy_image(self, page, rect, filename)
 
@@ -313,6 +361,7 @@ class DocumentChooserAction(ComboBoxAction):
     def __init__(self, panel):
         super(DocumentChooserAction, self).__init__(panel)
         self._model = None
+        self._filenames = []
         self._document = None
         self._documents = []
         self._currentIndex = -1
@@ -339,7 +388,6 @@ class DocumentChooserAction(ComboBoxAction):
         # is updated. Else the current document is switched if the document was
         # the current document to be engraved (e.g. sticky or master) and the
         # the job was started on this mainwindow
-        import engrave
         mainwindow = self.parent().mainwindow()
         if (doc == self._document or
             (job.attributes.get(j).mainwindow == mainwindow and
@@ -364,12 +412,19 @@ class DocumentChooserAction(ComboBoxAction):
         self.setVisible(bool(docs))
         self.setEnabled(bool(docs))
 
-        # make model for the docs
-        m = self._model = listmodel.ListModel([d.filename() for d in docs],
-            display = os.path.basename, icon = icons.file_type)
-        m.setRoleFunction(Qt.UserRole, lambda f: f)
-        for w in self.createdWidgets():
-            w.setModel(m)
+        # make model for the docs, unless the list of files is unchanged
+        filenames = [d.filename() for d in docs]
+        if self._model is None or filenames != self._filenames:
+            self._filenames = filenames
+            # store the basenames with the filenames, so displaying them
+            # is a simple lookup
+            items = [(f, os.path.basename(f)) for f in filenames]
+            m = self._model = listmodel.ListModel(items,
+                display = listmodel.display_index(1),
+                icon = lambda item: _file_icon(item[0]))
+            m.setRoleFunction(Qt.UserRole, listmodel.display_index(0))
+            for w in self.createdWidgets():
+                w.setModel(m)
 
         index = self._indices.get(self._document, 0)
         if index < 0 or index >= len(docs):
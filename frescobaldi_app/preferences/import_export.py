@@ -49,22 +49,19 @@ def exportTheme(widget, schemeName, filename):
     font = tfd.font
     fontfamily = font.family()
     fontsize = str(font.pointSizeF())
-    fontElt = ET.Element('font', {'fontFamily': fontfamily, 'fontSize': fontsize})
-    root.append(fontElt)
+    ET.SubElement(root, 'font', {'fontFamily': fontfamily, 'fontSize': fontsize})
 
-    baseColors = ET.Element('baseColors')
+    baseColors = ET.SubElement(root, 'baseColors')
     for name, color in tfd.baseColors.items():
-        elt = ET.Element(name)
-        elt.set('color', color.name())
-        baseColors.append(elt)
+        ET.SubElement(baseColors, name, {'color': color.name()})
 
-    defaultStyles = ET.Element('defaultStyles')
+    defaultStyles = ET.SubElement(root, 'defaultStyles')
     for name, fmt in tfd.defaultStyles.items():
         elt = styleToElt(fmt, name)
         if elt is not None:
             defaultStyles.append(elt)
 
-    allStyles = ET.Element('allStyles')
+    allStyles = ET.SubElement(root, 'allStyles')
     for name, styles in tfd.allStyles.items():
         subElt = ET.Element(name)
         for name, fmt in styles.items():
@@ -73,9 +70,6 @@ def exportTheme(widget, schemeName, filename):
                 subElt.append(elt)
         if list(subElt):
             allStyles.append(subElt)
-    root.append(baseColors)
-    root.append(defaultStyles)
-    root.append(allStyles)
 
     indentXml(root)
     d.write(filename, 'UTF-8')
@@ -147,17 +141,12 @@ def exportShortcut(widget, scheme, schemeName, filename):
     for col, shortcuts in lst.items():
         if not shortcuts:
             continue
-        colElt = ET.Element('collection')
-        colElt.set('name', col)
-        root.append(colElt)
+        colElt = ET.SubElement(root, 'collection', {'name': col})
         for name, shortList in shortcuts.items():
-            nameElt = ET.Element('name')
-            nameElt.set('name', name)
-            colElt.append(nameElt)
+            nameElt = ET.SubElement(colElt, 'name', {'name': name})
             for seq in shortList:
-                shortcutElt = ET.Element('shortcut')
+                shortcutElt = ET.SubElement(nameElt, 'shortcut')
                 shortcutElt.text = seq.toString()
-                nameElt.append(shortcutElt)
 
     indentXml(root)
     d.write(filename, 'UTF-8')
@@ -27,6 +27,7 @@ import collections
 from PyQt5.QtWidgets import (QCheckBox, QComboBox, QGridLayout, QHBoxLayout,
                              QLabel, QSpinBox)
 
+import app
 import listmodel
 import ly.dom
 
@@ -34,9 +35,23 @@ import ly.dom
 Category = collections.namedtuple("Category", "title items icon")
 
 
+# translations done by translate(), cleared when the language changes
+_translations = {}
+app.languageChanged.connect(lambda: _translations.clear(), -999)
+
+
 def translate(*args):
-    """Translate the arguments using the application's language."""
-    return _(*args)
+    """Translate the arguments using the application's language.
+
+    The result is cached until the language changes, as the part titles
+    are requested often, e.g. each time a part type is displayed.
+
+    """
+    try:
+        return _translations[args]
+    except KeyError:
+        t = _translations[args] = _(*args)
+        return t
 
 
 class Base(object):
@@ -56,34 +56,28 @@ def save(names, filename):
     root.append(comment)
 
     for name in names:
-        snippet = ET.Element('snippet')
+        snippet = ET.SubElement(root, 'snippet')
         snippet.set('id', name)
         snippet.text = '\n'
         snippet.tail = '\n\n'
 
-        title = ET.Element('title')
+        title = ET.SubElement(snippet, 'title')
         title.text = snippets.title(name, False)
         title.tail = '\n'
 
-        shortcuts = ET.Element('shortcuts')
+        shortcuts = ET.SubElement(snippet, 'shortcuts')
         ss = model.shortcuts(name)
         if ss:
             shortcuts.text = '\n'
             for s in ss:
-                shortcut = ET.Element('shortcut')
+                shortcut = ET.SubElement(shortcuts, 'shortcut')
                 shortcut.text = s.toString()
                 shortcut.tail = '\n'
-                shortcuts.append(shortcut)
         shortcuts.tail = '\n'
 
-        body = ET.Element('body')
+        body = ET.SubElement(snippet, 'body')
         body.text = snippets.text(name)
         body.tail = '\n'
-
-        snippet.append(title)
-        snippet.append(shortcuts)
-        snippet.append(body)
-        root.append(snippet)
     d.write(filename, "UTF-8")
 
 
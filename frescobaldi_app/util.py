@@ -252,6 +252,29 @@ def get_bom(data):
     return None, data
 
 
+def decode_encodings(bom=None, encoding=None, latin1=None):
+    """Yield the encodings to try, in order, to decode some binary data.
+
+    bom is the encoding found by get_bom() and encoding the specified encoding,
+    both may be None. latin1 is a function returning (the relevant parts of)
+    the data decoded as latin1. It is only called when those two encodings
+    failed, to get the encoding from the document variables (see variables
+    module). Then utf-8 and finally latin1, which never fails, are yielded.
+
+    No encoding is yielded twice.
+
+    """
+    def encodings():
+        yield bom
+        yield encoding
+        coding = variables.variables(latin1()).get("coding")
+        if coding != 'latin1':
+            yield coding
+        yield 'utf-8'
+        yield 'latin1'
+    return uniq(filter(None, encodings()))
+
+
 def decode(data, encoding=None):
     """Decode binary data, using encoding if specified.
 
@@ -262,21 +285,11 @@ def decode(data, encoding=None):
 
     """
     enc, data = get_bom(data)
-    for e in (enc, encoding):
-        if e:
-            try:
-                return data.decode(e)
-            except (UnicodeError, LookupError):
-                pass
-    latin1 = data.decode('latin1') # this never fails
-    encoding = variables.variables(latin1).get("coding")
-    for e in (encoding, 'utf-8'):
-        if e and e != 'latin1':
-            try:
-                return data.decode(e)
-            except (UnicodeError, LookupError):
-                pass
-    return latin1
+    for e in decode_encodings(enc, encoding, lambda: data.decode('latin1')):
+        try:
+            return data.decode(e)
+        except (UnicodeError, LookupError):
+            pass
 
 
 def encode(text, encoding=None, default_encoding='utf-8'):
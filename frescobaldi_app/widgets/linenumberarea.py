@@ -21,15 +21,24 @@
 A line number area to be used in a QPlainTextEdit.
 """
 
-from PyQt5.QtCore import QEvent, QPoint, QRect, QSize, Qt
-from PyQt5.QtGui import QFontMetrics, QMouseEvent, QPainter
+from PyQt5.QtCore import QEvent, QPoint, QPointF, QSize, Qt
+from PyQt5.QtGui import (
+    QFontMetrics, QMouseEvent, QPainter, QStaticText, QTransform)
 from PyQt5.QtWidgets import QApplication, QWidget
 
 
+# maximum number of cached line number texts
+_CACHE_SIZE = 1000
+
+
 class LineNumberArea(QWidget):
     def __init__(self, textedit=None):
         super(LineNumberArea, self).__init__(textedit)
         self._textedit = None
+        self._width = 0
+        self._numbers = {}  # cache of (QStaticText, width) for line numbers
+        self._digitWidths = {}  # text width per number of digits
+        self._lastY = None  # y position of the last forwarded mouse event
         self.setAutoFillBackground(True)
         self.setTextEdit(textedit)
 
@@ -38,11 +47,13 @@ class LineNumberArea(QWidget):
         if self._textedit:
             self._textedit.updateRequest.disconnect(self.slotUpdateRequest)
             self._textedit.blockCountChanged.disconnect(self.updateWidth)
+            self._textedit.removeEventFilter(self)
         self._textedit = edit
         if edit:
             edit.updateRequest.connect(self.slotUpdateRequest)
             edit.blockCountChanged.connect(self.updateWidth)
-            self.updateWidth()
+            edit.installEventFilter(self)
+            self.updateFont()
         else:
             self._width = 0
         self.update()
@@ -54,11 +65,31 @@ class LineNumberArea(QWidget):
     def sizeHint(self):
         return QSize(self._width, 50)
 
+    def eventFilter(self, edit, ev):
+        if ev.type() == QEvent.FontChange:
+            self.updateFont()
+        return False
+
+    def updateFont(self):
+        """Called when the font of the text edit changes."""
+        font = self._textedit.font()
+        self.setFont(font)
+        self._fontMetrics = QFontMetrics(font)
+        self._numbers.clear()
+        self._digitWidths.clear()
+        self.updateWidth()
+
     def updateWidth(self):
-        fm = QFontMetrics(self._textedit.font())
-        text = format(self._textedit.blockCount(), 'd')
-        self._width = fm.width(text) + 3
-        self.adjustSize()
+        digits = len(format(self._textedit.blockCount(), 'd'))
+        try:
+            width = self._digitWidths[digits]
+        except KeyError:
+            width = self._digitWidths[digits] = (
+                self._fontMetrics.width('0' * digits) + 3)
+        if width != self._width:
+            self._width = width
+            self.updateGeometry()
+            self.adjustSize()
 
     def slotUpdateRequest(self, rect, dy):
         if (dy):
@@ -71,26 +102,56 @@ class LineNumberArea(QWidget):
         if not edit:
             return
         painter = QPainter(self)
-        painter.setFont(edit.font())
-        rect = QRect(0, 0, self.width() - 2, QFontMetrics(edit.font()).height())
-        block = edit.firstVisibleBlock()
-        while block.isValid():
-            geom = edit.blockBoundingGeometry(block)
-            geom.translate(edit.contentOffset())
-            if geom.top() >= ev.rect().bottom():
+        font = self.font()
+        right = self.width() - 2
+        offset = edit.contentOffset()
+        top = ev.rect().top() + 1
+        bottom = ev.rect().bottom()
+        # start at the first block in the update rect, not at the top
+        block = edit.cursorForPosition(QPoint(0, max(0, top - 1))).block()
+        if not block.isValid():
+            block = edit.firstVisibleBlock()
+            if not block.isValid():
+                return
+        numbers = self._numbers
+        geometry = edit.blockBoundingGeometry
+        draw = painter.drawStaticText
+        while True:
+            geom = geometry(block).translated(offset)
+            geomTop = geom.top()
+            if geomTop >= bottom:
                 break
-            if block.isVisible() and geom.bottom() > ev.rect().top() + 1:
-                rect.moveTop(geom.top())
-                text = format(block.blockNumber() + 1, 'd')
-                painter.drawText(rect, Qt.AlignRight, text)
+            if geom.bottom() > top and block.isVisible():
+                num = block.blockNumber() + 1
+                try:
+                    text, width = numbers[num]
+                except KeyError:
+                    if len(numbers) >= _CACHE_SIZE:
+                        numbers.clear()
+                    text = QStaticText(format(num, 'd'))
+                    text.setTextFormat(Qt.PlainText)
+                    text.prepare(QTransform(), font)
+                    width = text.size().width()
+                    numbers[num] = text, width
+                draw(QPointF(right - width, geomTop), text)
             block = block.next()
+            if not block.isValid():
+                break
 
     def event(self, ev):
         if self._textedit:
             if ((ev.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease)
                  and ev.button() == Qt.LeftButton)
                 or (ev.type() == QEvent.MouseMove and ev.buttons() & Qt.LeftButton)):
-                new = QMouseEvent(ev.type(), QPoint(0, ev.y()),
+                y = ev.y()
+                if ev.type() == QEvent.MouseMove:
+                    # the viewport only cares about the y position
+                    if y == self._lastY:
+                        return True
+                    self._lastY = y
+                else:
+                    self._lastY = None
+                new = QMouseEvent(ev.type(), QPoint(0, y),
                     ev.button(), ev.buttons(), ev.modifiers())
                 return QApplication.sendEvent(self._textedit.viewport(), new)
             elif ev.type() == QEvent.Wheel: